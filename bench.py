@@ -0,0 +1,100 @@
+"""起動パスのベンチマーク
+
+    python snapshot.py   # スナップショットがなければ先に作る
+    python bench.py
+
+新しいプロセスで実行し、プロセスの起動から streamlit の読み込み、スナップショットの
+読み込みを経て、初期表示のチャートを st.plotly_chart と同じ手順（figure の検証と
+JSON 化）で送れる状態にするまでの秒数を計測する。Streamlit サーバーの起動処理と
+ブラウザでの描画は含まない。
+比較用にスナップショットのデータからチャートを作り直す時間も出す。
+あわせて10年表示のチャートをブラウザに送る JSON のサイズを上限と比べる。
+"""
+import time
+
+from metrics import PROCESS_STARTED_AT
+
+import argparse
+import sys
+
+# 初期表示までの時間の上限（秒）
+STARTUP_BUDGET_SECONDS = 2.0
+
+# 10年表示・全相場のとき、ローソク足と折れ線を合わせた JSON の上限（バイト）
+PAYLOAD_BUDGET_BYTES = 900_000
+
+
+def payload_bytes(fig):
+    """ブラウザに送られる figure の JSON サイズ（Streamlit と同じく plotly.io.to_json で計測）"""
+    import plotly.io as pio
+
+    return len(pio.to_json(fig, validate=False).encode("utf-8"))
+
+
+def render_payload(figure):
+    """st.plotly_chart が描画時に行う処理（figure の検証と JSON 化）"""
+    import plotly.io as pio
+    import plotly.tools
+
+    fig = plotly.tools.return_figure_from_figure_or_data(figure, True)
+    return pio.to_json(fig, validate=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS,
+                        help="初期表示までの時間の上限（秒）")
+    parser.add_argument("--payload-budget", type=int, default=PAYLOAD_BUDGET_BYTES,
+                        help="10年表示の JSON サイズの上限（バイト）")
+    args = parser.parse_args()
+
+    # app.py と同じく streamlit を読み込んでから計測を続ける
+    import streamlit  # noqa: F401
+
+    from snapshot import SNAPSHOT_PATH, default_selection, load_snapshot
+
+    snapshot = load_snapshot(max_age_hours=None)
+    if snapshot is None:
+        print(f"スナップショットがありません: {SNAPSHOT_PATH}（先に python snapshot.py を実行してください）",
+              file=sys.stderr)
+        return 1
+    figures = snapshot["figures"]
+    for figure in figures.values():
+        render_payload(figure)
+    time_to_first_render = time.perf_counter() - PROCESS_STARTED_AT
+
+    # 比較用：スナップショットのデータからチャートを作り直す
+    from charts import build_candlestick_figure, build_line_figure
+    from market import process_market_data
+
+    t0 = time.perf_counter()
+    period, selected = default_selection()
+    chart_data, latest = process_market_data(snapshot["data"], period, snapshot["created_at"])
+    build_candlestick_figure(chart_data, latest, selected)
+    build_line_figure(chart_data, latest, selected)
+    rebuild_seconds = time.perf_counter() - t0
+
+    # 10年表示のチャートの送信サイズ
+    chart_data, latest = process_market_data(snapshot["data"], "10年", snapshot["created_at"])
+    candle_bytes = payload_bytes(build_candlestick_figure(chart_data, latest, selected))
+    line_bytes = payload_bytes(build_line_figure(chart_data, latest, selected))
+    total_bytes = candle_bytes + line_bytes
+
+    print(f"time_to_first_render={time_to_first_render:.3f}s (budget {args.budget:.1f}s)")
+    print(f"rebuild_default_figures={rebuild_seconds:.3f}s")
+    print(f"precomputed_figures={len(figures)}")
+    print(f"payload_10y_candle={candle_bytes}B payload_10y_line={line_bytes}B")
+    print(f"payload_10y_total={total_bytes}B (budget {args.payload_budget}B)")
+
+    ok = True
+    if time_to_first_render > args.budget:
+        print("初期表示までの時間が上限を超えています", file=sys.stderr)
+        ok = False
+    if total_bytes > args.payload_budget:
+        print("10年表示の JSON サイズが上限を超えています", file=sys.stderr)
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import base64
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from market import ASSETS
+
+# 1つのチャートあたりの高さ
+HEIGHT_PER_CHART = 250
+
+# この点数以上の折れ線は WebGL（Scattergl）で描画する
+WEBGL_MIN_POINTS = 1000
+
+
+def typed_array(values, dtype="f4"):
+    """数値の配列を plotly の typed array 形式（base64）に変換する
+
+    JSON の数値リストより小さく、ブラウザ側でもそのまま型付き配列として読み込まれる。
+    価格は表示用なので float32 で十分。
+    """
+    arr = np.ascontiguousarray(values, dtype="<" + dtype)
+    return {"dtype": dtype, "bdata": base64.b64encode(arr.tobytes()).decode("ascii")}
+
+
+def date_array(index):
+    """日付を "YYYY-MM-DD" の文字列のリストに変換する
+
+    ミリ秒の数値で送るとブラウザのタイムゾーンでずれるので文字列で送る。
+    plotly の JSON ではトレース間で配列を共有できないため、日付はトレースごとに持たせる。
+    """
+    return list(index.strftime("%Y-%m-%d"))
+
+
+def pct_ticks(latest, y_min, y_max):
+    """最新価格を基準にした％表示のティック位置とラベルを返す"""
+    ticks = []
+    labels = []
+    for pct in range(-20, 21, 5):  # -20%から+20%まで5%刻み
+        tick_value = latest * (1 + pct/100)
+        if y_min <= tick_value <= y_max:  # グラフの範囲内のみ表示
+            ticks.append(tick_value)
+            labels.append(f"{pct}%")
+    return ticks, labels
+
+
+def _make_figure(rows):
+    # サブプロットを作成（選択された相場の数だけ行を作成）
+    return make_subplots(
+        rows=rows,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05
+    )
+
+
+def _finish_layout(fig, rows):
+    # レイアウト設定
+    fig.update_layout(
+        height=HEIGHT_PER_CHART * rows,  # チャート数に応じて高さを設定
+        template="plotly_dark",
+        showlegend=True,
+        legend=dict(orientation="h", y=1.02),
+        margin=dict(l=10, r=10, t=30, b=10)
+    )
+
+    # X軸は最後の行だけラベルを表示
+    fig.update_xaxes(title_text="日付", row=rows, col=1)
+
+
+def _update_pct_axis(fig, row_idx, title, latest, y_min, y_max):
+    # 価格と変化率を両方表示するためのy軸設定
+    ticks, labels = pct_ticks(latest, y_min, y_max)
+    fig.update_yaxes(
+        title_text=title,
+        tickvals=ticks,  # カスタムティックの位置
+        ticktext=labels,  # カスタムティックのラベル
+        row=row_idx, col=1,
+        showgrid=True,  # グリッドラインを表示
+        gridcolor='rgba(128, 128, 128, 0.3)'  # グリッドラインの色
+    )
+
+
+def build_candlestick_figure(chart_data, latest, selected):
+    """選択された相場のローソク足チャートを作成する"""
+    rows = max(len(selected), 1)
+    fig = _make_figure(rows)
+
+    row_idx = 1  # 行インデックス
+    for asset in ASSETS:
+        if asset.key not in selected:
+            continue
+        df = chart_data[asset.key]
+        fig.add_trace(
+            go.Candlestick(
+                x=date_array(df.index),
+                open=typed_array(df['Open']),
+                high=typed_array(df['High']),
+                low=typed_array(df['Low']),
+                close=typed_array(df['Close']),
+                name=asset.candle_name
+            ),
+            row=row_idx, col=1
+        )
+        _update_pct_axis(fig, row_idx, asset.title, latest[asset.key],
+                         df['Low'].min(), df['High'].max())
+        row_idx += 1
+
+    # ローソク足のレンジスライダーを非表示
+    fig.update_xaxes(rangeslider_visible=False)
+
+    _finish_layout(fig, rows)
+    return fig
+
+
+def build_line_figure(chart_data, latest, selected):
+    """選択された相場の折れ線グラフを作成する"""
+    rows = max(len(selected), 1)
+    fig = _make_figure(rows)
+
+    row_idx = 1  # 行インデックス
+    for asset in ASSETS:
+        if asset.key not in selected:
+            continue
+        df = chart_data[asset.key]
+        # 点数が多い折れ線は SVG だと重いので WebGL で描画
+        scatter = go.Scattergl if len(df) >= WEBGL_MIN_POINTS else go.Scatter
+        fig.add_trace(
+            scatter(
+                x=date_array(df.index),
+                y=typed_array(df['Close']),
+                mode='lines',
+                name=asset.title
+            ),
+            row=row_idx, col=1
+        )
+        _update_pct_axis(fig, row_idx, asset.title, latest[asset.key],
+                         df['Close'].min(), df['Close'].max())
+        row_idx += 1
+
+    _finish_layout(fig, rows)
+    return fig
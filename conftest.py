@@ -0,0 +1 @@
+# tests/ からリポジトリ直下のモジュール（market.py など）を読み込めるようにするための conftest
@@ -0,0 +1,108 @@
+from collections import namedtuple
+from datetime import timedelta
+
+import pandas as pd
+
+# 相場の定義（表示順）
+# key: 内部名 / ticker: yfinance のティッカー / label: チェックボックスの表示名
+# title: y軸タイトル（折れ線の凡例名も兼ねる） / candle_name: ローソク足の凡例名
+# to_jpy: ドル円を掛けて円建てに変換するかどうか
+Asset = namedtuple("Asset", ["key", "ticker", "label", "title", "candle_name", "to_jpy"])
+
+ASSETS = [
+    Asset("usdjpy", "JPY=X", "ドル円", "USD/JPY", "USD/JPY", False),
+    Asset("nikkei", "^N225", "日経平均", "日経平均", "日経平均", False),
+    Asset("sp500", "^GSPC", "S&P500（円建て）", "S&P500（円）", "S&P500（円）", True),
+    Asset("gold", "GC=F", "金相場（円建て）", "金価格（円）", "金価格（円）", True),
+    Asset("copper", "HG=F", "銅相場（円建て）", "銅価格（円）", "銅価格（円）", True),
+    Asset("btc", "BTC-USD", "ビットコイン（円建て）", "BTC/JPY", "ビットコイン（円）", True),
+]
+
+# 表示したいティッカーのリスト
+TICKERS = [asset.ticker for asset in ASSETS]
+
+# 期間の日数マッピング
+PERIOD_DAYS = {
+    "1ヶ月": 30,
+    "3ヶ月": 90,
+    "6ヶ月": 180,
+    "1年": 365,
+    "5年": 365 * 5,
+    "10年": 365 * 10
+}
+
+# 初期表示の期間（selectbox の index と合わせる）
+DEFAULT_PERIOD = "6ヶ月"
+
+OHLC = ["Open", "High", "Low", "Close"]
+
+
+def download_market_data(tickers, period="10y", on_error=None):
+    """すべての相場データを取得する（yfinance は必要になるまで読み込まない）"""
+    import yfinance as yf
+
+    data = {}
+    for ticker in tickers:
+        try:
+            ticker_data = yf.download(ticker, period=period, interval="1d")
+            if not ticker_data.empty:
+                data[ticker] = ticker_data
+        except Exception as e:
+            if on_error is not None:
+                on_error(ticker, e)
+    return data
+
+
+# データを簡素化（マルチインデックスがあれば解消）
+def simplify_dataframe(df):
+    # 単純な列名のデータフレームに変換
+    if isinstance(df.columns, pd.MultiIndex):
+        # マルチインデックスの場合は最初のレベルだけを使用
+        df.columns = df.columns.get_level_values(0)
+    return df
+
+
+def process_market_data(all_data, period, end_date):
+    """期間で絞り込み、円建てに変換したチャート用データと最新価格を返す
+
+    共通の日付がない場合は空の辞書を2つ返す。
+    """
+    start_date = end_date - timedelta(days=PERIOD_DAYS[period])
+
+    # 選択された期間でフィルタリング
+    frames = {}
+    for asset in ASSETS:
+        df = simplify_dataframe(all_data.get(asset.ticker, pd.DataFrame()).copy())
+        frames[asset.key] = df.loc[start_date:end_date]
+
+    # 共通日付を確認
+    common = set(frames["usdjpy"].index)
+    for df in frames.values():
+        common &= set(df.index)
+    common_dates = sorted(common)
+
+    if not common_dates:
+        return {}, {}
+
+    filtered = {key: df.loc[common_dates] for key, df in frames.items()}
+    usdjpy_filtered = filtered["usdjpy"]
+
+    chart_data = {}
+    latest = {}
+    for asset in ASSETS:
+        if asset.to_jpy:
+            # 円建て変換（行循環処理ではなくDataFrame演算）
+            jpy = pd.DataFrame(index=common_dates)
+            for col in OHLC:
+                jpy[col] = filtered[asset.key][col] * usdjpy_filtered[col]
+            chart_data[asset.key] = jpy
+            latest_source = jpy
+        else:
+            # ドル円・日経平均は期間で絞り込んだだけのデータを表示
+            chart_data[asset.key] = frames[asset.key]
+            latest_source = filtered[asset.key]
+
+        # 最新価格を取得（変化率計算用）
+        latest[asset.key] = latest_source['Close'].iloc[-1] if not latest_source.empty else 0
+
+    return chart_data, latest
@@ -0,0 +1,56 @@
+"""起動時の計測（最初の描画までの時間）
+
+プロセス（Streamlit サーバー）の起動から、最初のチャートを
+st.plotly_chart でブラウザに送るまでの秒数をプロセスで1回だけ記録する。
+サーバー側で計測するので、ブラウザでの描画時間は含まない。
+また最初のアクセスが来るまで待っていた時間も含まれるので、
+あわせて最初のスクリプト実行にかかった秒数も出す。
+"""
+import os
+import threading
+import time
+
+
+def _process_age_seconds():
+    # /proc/self/stat の starttime（起動後のクロック数）と /proc/uptime からプロセスの経過時間を求める
+    try:
+        with open("/proc/self/stat") as f:
+            # comm に空白が入ることがあるので ")" より後ろを分割する
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return max(uptime - started, 0.0)
+    except (OSError, ValueError, IndexError):
+        # /proc が無い環境ではこのモジュールを読み込んだ時点から計測する
+        return 0.0
+
+
+# 最初のスクリプト実行開始（このモジュールが最初に読み込まれた時刻）
+SCRIPT_STARTED_AT = time.perf_counter()
+# プロセスの起動時刻（perf_counter 基準）
+PROCESS_STARTED_AT = SCRIPT_STARTED_AT - _process_age_seconds()
+
+_lock = threading.Lock()
+_first_render_seconds = None
+
+
+def record_first_render(source):
+    """最初の描画までの秒数を記録してログに出す（2回目以降は何もしない）"""
+    global _first_render_seconds
+    with _lock:
+        if _first_render_seconds is not None:
+            return None
+        now = time.perf_counter()
+        _first_render_seconds = now - PROCESS_STARTED_AT
+        script_seconds = now - SCRIPT_STARTED_AT
+
+    # docker logs で追えるように標準出力に出す
+    print(f"[startup] time_to_first_render={_first_render_seconds:.3f}s "
+          f"first_script_run={script_seconds:.3f}s source={source}", flush=True)
+    return _first_render_seconds
+
+
+def first_render_seconds():
+    """記録済みの最初の描画までの秒数（未記録なら None）"""
+    return _first_render_seconds
@@ -0,0 +1,168 @@
+"""加工済みデータと初期表示のチャートを事前に作ってディスクに保存する
+
+コンテナ起動直後の最初の表示でデータのダウンロードとチャート作成を
+待たなくて済むように、ビルド時に `python snapshot.py` で作成しておく。
+アプリはスナップショットが古くてもまずそれを表示し、古ければ描画後に
+裏でデータを取り直してスナップショットを保存し直す（stale-while-revalidate）。
+"""
+import os
+import pickle
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+# スナップショットの保存先と有効期限（環境変数で変更可能）
+SNAPSHOT_PATH = os.environ.get(
+    "SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshot", "market_snapshot.pkl"),
+)
+# これより古いスナップショットは裏で取り直す（データのキャッシュの ttl と同じ1時間）
+SNAPSHOT_MAX_AGE_HOURS = float(os.environ.get("SNAPSHOT_MAX_AGE_HOURS", "1"))
+# 取り直しに失敗したときに次に試すまでの間隔（秒）
+REFRESH_RETRY_SECONDS = 300
+
+SNAPSHOT_VERSION = 3
+
+
+def default_selection():
+    """初期表示の状態（期間と表示する相場）"""
+    from market import ASSETS, DEFAULT_PERIOD
+
+    return (DEFAULT_PERIOD, tuple(asset.key for asset in ASSETS))
+
+
+def is_complete(all_data):
+    """すべてのティッカーのデータが揃っているか"""
+    from market import TICKERS
+
+    return all(ticker in all_data for ticker in TICKERS)
+
+
+def build_snapshot(all_data, created_at=None):
+    """取得済みの相場データから初期表示のチャート込みのスナップショットを作る"""
+    from charts import build_candlestick_figure, build_line_figure
+    from market import process_market_data
+
+    created_at = created_at or datetime.now()
+    period, selected = default_selection()
+    chart_data, latest = process_market_data(all_data, period, created_at)
+
+    figures = {}
+    if chart_data:
+        figures = {
+            "candle": build_candlestick_figure(chart_data, latest, selected).to_dict(),
+            "line": build_line_figure(chart_data, latest, selected).to_dict(),
+        }
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "created_at": created_at,
+        "data": all_data,
+        "selection": (period, selected),
+        "figures": figures,
+    }
+
+
+def save_snapshot(snapshot, path=SNAPSHOT_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # 書き込み途中のファイルを読まないように一時ファイル経由で置き換える
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def refresh_snapshot(all_data, path=SNAPSHOT_PATH):
+    """データが揃っていればスナップショットを作って保存する（保存したら返す、しなければ None）"""
+    if not is_complete(all_data):
+        return None
+    snapshot = build_snapshot(all_data)
+    if not snapshot["figures"]:
+        return None
+    save_snapshot(snapshot, path)
+    return snapshot
+
+
+_refresh_lock = threading.Lock()
+_last_refresh_started = None
+
+
+def refresh_in_background(fetch, on_saved=None, path=SNAPSHOT_PATH):
+    """別スレッドで fetch() のデータからスナップショットを作り直して保存する
+
+    実行中や直前に試したばかりのときは何もしない（開始したら True）。
+    保存できたら on_saved() を呼ぶ。
+    """
+    global _last_refresh_started
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+    now = time.monotonic()
+    if _last_refresh_started is not None and now - _last_refresh_started < REFRESH_RETRY_SECONDS:
+        _refresh_lock.release()
+        return False
+    _last_refresh_started = now
+
+    def run():
+        try:
+            if refresh_snapshot(fetch(), path) is not None and on_saved is not None:
+                on_saved()
+        except Exception as e:
+            print(f"スナップショットを保存できませんでした: {e}", flush=True)
+        finally:
+            _refresh_lock.release()
+
+    threading.Thread(target=run, name="snapshot-refresh", daemon=True).start()
+    return True
+
+
+def is_fresh(snapshot, max_age_hours=SNAPSHOT_MAX_AGE_HOURS, now=None):
+    """スナップショットが有効期限内か（max_age_hours が None なら常に有効）"""
+    if max_age_hours is None:
+        return True
+    now = now or datetime.now()
+    return now - snapshot["created_at"] <= timedelta(hours=max_age_hours)
+
+
+def load_snapshot(path=SNAPSHOT_PATH, max_age_hours=SNAPSHOT_MAX_AGE_HOURS, now=None):
+    """スナップショットを読み込む（無い・古い・欠けている・壊れている場合は None）
+
+    max_age_hours に None を渡すと有効期限を確認しない。
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except Exception:
+        return None
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if not is_complete(snapshot["data"]) or not snapshot["figures"]:
+        return None
+    if not is_fresh(snapshot, max_age_hours, now):
+        return None
+    return snapshot
+
+
+def main():
+    from market import TICKERS, download_market_data
+
+    def warn(ticker, e):
+        print(f"{ticker}のデータ取得中にエラーが発生しました: {e}", file=sys.stderr)
+
+    all_data = download_market_data(TICKERS, on_error=warn)
+    snapshot = refresh_snapshot(all_data)
+    if snapshot is None:
+        print("データが揃わなかったためスナップショットを作成しませんでした", file=sys.stderr)
+        return 1
+
+    print(f"スナップショットを保存しました: {SNAPSHOT_PATH} ({snapshot['created_at']:%Y-%m-%d %H:%M})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
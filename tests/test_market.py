@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from market import ASSETS, process_market_data
+
+END = datetime(2024, 6, 28)
+
+
+def make_frame(index, start=100.0):
+    close = np.linspace(start, start * 1.1, len(index))
+    return pd.DataFrame(
+        {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close},
+        index=index,
+    )
+
+
+def make_data():
+    """ドル円は平日、日経平均は一部休場、ビットコインは毎日、その他は平日のデータ"""
+    weekdays = pd.bdate_range("2024-01-01", END)
+    data = {}
+    for asset in ASSETS:
+        if asset.key == "btc":
+            index = pd.date_range("2024-01-01", END)
+        elif asset.key == "nikkei":
+            index = weekdays.delete([3, 10])
+        elif asset.key == "sp500":
+            index = weekdays.delete([5])
+        else:
+            index = weekdays
+        data[asset.ticker] = make_frame(index)
+    return data
+
+
+def test_usdjpy_and_nikkei_keep_their_own_trading_days():
+    data = make_data()
+    chart_data, _ = process_market_data(data, "6ヶ月", END)
+
+    start = END - pd.Timedelta(days=180)
+    for key, ticker in (("usdjpy", "JPY=X"), ("nikkei", "^N225")):
+        expected = data[ticker].loc[start:END].index
+        assert chart_data[key].index.equals(expected)
+
+
+def test_jpy_assets_use_common_dates():
+    data = make_data()
+    chart_data, latest = process_market_data(data, "6ヶ月", END)
+
+    common = chart_data["usdjpy"].index.intersection(chart_data["nikkei"].index)
+    common = common.intersection(chart_data["sp500"].index)
+    for key in ("sp500", "gold", "copper", "btc"):
+        assert chart_data[key].index.equals(common)
+
+    # 円建て = ドル建て × ドル円
+    usdjpy_close = data["JPY=X"].loc[common, "Close"]
+    gold_close = data["GC=F"].loc[common, "Close"]
+    np.testing.assert_allclose(chart_data["gold"]["Close"], gold_close * usdjpy_close)
+    assert latest["gold"] == chart_data["gold"]["Close"].iloc[-1]
+
+
+def test_no_common_dates_returns_empty():
+    data = make_data()
+    data["BTC-USD"] = make_frame(pd.date_range("2020-01-01", "2020-02-01"))
+
+    assert process_market_data(data, "1ヶ月", END) == ({}, {})
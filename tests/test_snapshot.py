@@ -0,0 +1,66 @@
+import pickle
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market import TICKERS
+from snapshot import SNAPSHOT_VERSION, load_snapshot, refresh_snapshot
+
+
+def make_data():
+    index = pd.bdate_range(end=datetime.now(), periods=300).normalize()
+    close = np.linspace(100.0, 120.0, len(index))
+    frame = pd.DataFrame(
+        {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close},
+        index=index,
+    )
+    return {ticker: frame.copy() for ticker in TICKERS}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "market_snapshot.pkl")
+
+
+def test_refresh_and_load(path):
+    snapshot = refresh_snapshot(make_data(), path)
+
+    assert snapshot is not None
+    assert set(snapshot["figures"]) == {"candle", "line"}
+    assert load_snapshot(path) is not None
+
+
+def test_incomplete_data_is_not_saved(path):
+    data = make_data()
+    del data["HG=F"]
+
+    assert refresh_snapshot(data, path) is None
+    assert load_snapshot(path, max_age_hours=None) is None
+
+
+def test_incomplete_snapshot_is_rejected(path):
+    snapshot = refresh_snapshot(make_data(), path)
+    del snapshot["data"]["HG=F"]
+    with open(path, "wb") as f:
+        pickle.dump(snapshot, f)
+
+    assert load_snapshot(path, max_age_hours=None) is None
+
+
+def test_wrong_version_is_rejected(path):
+    snapshot = refresh_snapshot(make_data(), path)
+    snapshot["version"] = SNAPSHOT_VERSION - 1
+    with open(path, "wb") as f:
+        pickle.dump(snapshot, f)
+
+    assert load_snapshot(path, max_age_hours=None) is None
+
+
+def test_stale_snapshot_is_rejected_unless_age_is_ignored(path):
+    refresh_snapshot(make_data(), path)
+    later = datetime.now() + timedelta(hours=2)
+
+    assert load_snapshot(path, max_age_hours=1, now=later) is None
+    assert load_snapshot(path, max_age_hours=None, now=later) is not None